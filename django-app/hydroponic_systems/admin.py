@@ -1,11 +1,59 @@
 from django.contrib import admin
-from .models import HydroponicSystem, Measurement
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import HydroponicSystem, Job, Measurement
+
+# Below this many rows the planner estimate is not trusted and COUNT(*) is cheap anyway
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the row count of an unfiltered changelist from the
+    Postgres planner statistics (pg_class.reltuples) instead of a COUNT(*)
+    over the whole table. Filtered changelists are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if connection.vendor == 'postgresql' and not query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [self.object_list.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return int(row[0])
+        return super().count
 
 
 @admin.register(HydroponicSystem)
 class HydroponicSystemAdmin(admin.ModelAdmin):
-    list_display = ('name', 'owner', 'label', 'created_at', 'updated_at')
+    list_display = ('name', 'owner', 'label', 'ingest_quota', 'deleting', 'created_at', 'updated_at')
+    list_select_related = ('owner',)
+    search_fields = ('name', 'label')
+    autocomplete_fields = ('owner',)
 
 @admin.register(Measurement)
 class MeasurementAdmin(admin.ModelAdmin):
-    list_display = ('system', 'created_at', 'pH', 'water_temperature', 'TDS')
+    list_display = ('system', 'measured_at', 'created_at', 'pH', 'water_temperature', 'TDS')
+    list_select_related = ('system',)
+    autocomplete_fields = ('system',)
+    # Range filters served by the created_at index, date_hierarchy would run a
+    # SELECT DISTINCT over the truncated dates of the whole table
+    list_filter = (('created_at', admin.DateFieldListFilter),)
+    show_facets = admin.ShowFacets.NEVER
+    ordering = ('-created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'owner', 'status', 'progress', 'total', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    list_select_related = ('owner',)
+    raw_id_fields = ('owner',)
@@ -0,0 +1,112 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Avg, Count, Max, Min, Q
+
+from .models import Measurement
+
+AGGREGATES = ['count', 'min', 'max', 'avg', 'histogram']
+VALUE_FIELDS = ['pH', 'water_temperature', 'TDS']
+MAX_BINS = 100
+
+# Default histogram ranges, matching the serializer validation where it has one
+HISTOGRAM_RANGES = {
+    'pH': (Decimal('0'), Decimal('14')),
+    'water_temperature': (Decimal('0'), Decimal('100')),
+    'TDS': (Decimal('0'), Decimal('2000')),
+}
+
+
+def _parse_decimal(value, name):
+    try:
+        value = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+    if not value.is_finite():
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def _histogram_bins(params):
+    """
+    Return (field, [(lower, upper), ...]) of the histogram requested by the
+    histogram_field, bins, histogram_min and histogram_max query parameters.
+    """
+    field = params.get('histogram_field', 'pH')
+    if field not in VALUE_FIELDS:
+        raise ValueError(f"histogram_field must be one of: {', '.join(VALUE_FIELDS)}")
+
+    try:
+        bins = int(params.get('bins', 10))
+    except ValueError:
+        raise ValueError("bins must be an integer")
+    if not 1 <= bins <= MAX_BINS:
+        raise ValueError(f"bins must be between 1 and {MAX_BINS}")
+
+    default_lower, default_upper = HISTOGRAM_RANGES[field]
+    lower = _parse_decimal(params.get('histogram_min', default_lower), 'histogram_min')
+    upper = _parse_decimal(params.get('histogram_max', default_upper), 'histogram_max')
+
+    model_field = Measurement._meta.get_field(field)
+    limit = Decimal(10) ** (model_field.max_digits - model_field.decimal_places)
+    if not -limit < lower < upper < limit:
+        raise ValueError(f"histogram_min must be lower than histogram_max, both within ±{limit}")
+
+    step = Decimal(10) ** -model_field.decimal_places
+    width = (upper - lower) / bins
+    if width < step:
+        raise ValueError(f"bins must be at least {step} wide, use fewer bins or a wider range")
+    edges = [(lower + width * i).quantize(step) for i in range(bins)] + [upper.quantize(step)]
+    return field, list(zip(edges, edges[1:]))
+
+
+def aggregate_measurements(queryset, params):
+    """
+    Compute the aggregates listed in the comma separated `aggregate` query
+    parameter over the measurement queryset in a single SQL query.
+
+    Histogram bins are conditional counts, lower bound inclusive and upper
+    bound exclusive except for the last bin. Raises ValueError on invalid
+    parameters.
+    """
+    requested = [name.strip() for name in params.get('aggregate', '').split(',') if name.strip()]
+    unknown = set(requested) - set(AGGREGATES)
+    if not requested or unknown:
+        raise ValueError(f"aggregate must be a comma separated list of: {', '.join(AGGREGATES)}")
+
+    functions = {'min': Min, 'max': Max, 'avg': Avg}
+    expressions = {}
+    if 'count' in requested:
+        expressions['count'] = Count('id')
+    for name, function in functions.items():
+        if name in requested:
+            for field in VALUE_FIELDS:
+                # The model field converts the stored integer units back to a Decimal
+                output_field = Measurement._meta.get_field(field)
+                expressions[f'{name}__{field}'] = function(field, output_field=output_field)
+    if 'histogram' in requested:
+        histogram_field, bins = _histogram_bins(params)
+        last = len(bins) - 1
+        for index, (lower, upper) in enumerate(bins):
+            upper_lookup = 'lte' if index == last else 'lt'
+            expressions[f'histogram__{index}'] = Count('id', filter=Q(**{
+                f'{histogram_field}__gte': lower,
+                f'{histogram_field}__{upper_lookup}': upper,
+            }))
+
+    values = queryset.order_by().aggregate(**expressions)
+
+    result = {}
+    if 'count' in requested:
+        result['count'] = values['count']
+    for name in functions:
+        if name in requested:
+            result[name] = {field: values[f'{name}__{field}'] for field in VALUE_FIELDS}
+    if 'histogram' in requested:
+        result['histogram'] = {
+            'field': histogram_field,
+            'bins': [
+                {'min': lower, 'max': upper, 'count': values[f'histogram__{index}']}
+                for index, (lower, upper) in enumerate(bins)
+            ],
+        }
+    return result
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HydroponicSystemsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hydroponic_systems'
+
+    def ready(self):
+        from . import authentication  # noqa: F401 (connects signal receivers)
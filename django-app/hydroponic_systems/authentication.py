@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_KEY = 'jwt-user:{}'
+
+
+def get_user_cache_key(user_id):
+    return USER_CACHE_KEY.format(user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds the request user from the token claims.
+
+    The user's primary key, active flag, username and, with CHECK_REVOKE_TOKEN,
+    password hash are cached for JWT_USER_CACHE_TIMEOUT seconds, so only the
+    first request of a user within that window touches the user table. The
+    returned user is built in memory around the primary key, which is all the
+    views need to filter by owner; it must never be saved.
+
+    Changes to a user drop its cache entry, see invalidate_cached_user(). The
+    other processes only see that when the cache is shared (REDIS_URL); with the
+    default local-memory cache they keep authenticating a deactivated user for
+    up to JWT_USER_CACHE_TIMEOUT seconds.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        cache_key = get_user_cache_key(user_id)
+        cached = cache.get(cache_key)
+        if cached is None:
+            cached = self.get_cached_values(user_id)
+            if cached is None:
+                raise AuthenticationFailed("User not found", code='user_not_found')
+            cache.set(cache_key, cached, settings.JWT_USER_CACHE_TIMEOUT)
+
+        pk, is_active, username, password_hash = cached
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+
+        user = self.user_model(**{
+            api_settings.USER_ID_FIELD: user_id,
+            self.user_model.USERNAME_FIELD: username,
+            'is_active': is_active,
+        })
+        user.pk = pk
+        user._state.adding = False
+        return user
+
+    def get_cached_values(self, user_id):
+        """
+        Return (pk, is_active, username, password_hash) of the user, where the
+        password hash is only read when CHECK_REVOKE_TOKEN is on. Returns None
+        if the user does not exist.
+        """
+        fields = ['pk', 'is_active', self.user_model.USERNAME_FIELD]
+        if api_settings.CHECK_REVOKE_TOKEN:
+            fields.append('password')
+        values = (
+            self.user_model.objects
+            .filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values_list(*fields)
+            .first()
+        )
+        if values is None:
+            return None
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return (*values[:3], get_md5_hash_password(values[3]))
+        return (*values, None)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop the cached claims user when the user row changes, so deactivation,
+    deletion and password changes take effect on the next request.
+    """
+    cache.delete(get_user_cache_key(getattr(instance, api_settings.USER_ID_FIELD)))
@@ -0,0 +1,54 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import models
+
+SMALLINT_MAX = 32767
+INTEGER_MAX = 2147483647
+
+
+class ScaledDecimalField(models.DecimalField):
+    """
+    Decimal field stored as an integer count of 10**-decimal_places units,
+    e.g. pH 6.55 is stored as 655.
+
+    It behaves like a DecimalField in Python, forms and serializers, but the
+    column is a smallint, integer or bigint (the smallest that fits
+    max_digits) instead of a numeric, which is smaller on disk and cheaper to
+    compare and index.
+
+    Lookups, ordering, Sum, Min and Max work as with a DecimalField, but other
+    database expressions see the stored integers: Avg resolves to a plain
+    DecimalField and constants in F() arithmetic are not scaled, so
+    aggregate(Avg('pH')) returns 655 for 6.55 and update(pH=F('pH') + 1) adds
+    0.01. Pass output_field=<this field> to Avg and to annotations, and wrap
+    constants in Value(..., output_field=<this field>). Multiplying or
+    dividing two scaled values needs rescaling by hand.
+    """
+
+    def get_internal_type(self):
+        largest = 10 ** self.max_digits - 1
+        if largest <= SMALLINT_MAX:
+            return 'SmallIntegerField'
+        if largest <= INTEGER_MAX:
+            return 'IntegerField'
+        return 'BigIntegerField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        if isinstance(value, int):
+            return Decimal(value).scaleb(-self.decimal_places)
+        # Non-integer results such as AVG() of the column
+        return Decimal(str(value)).scaleb(-self.decimal_places)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        value = self.to_python(value)
+        return int(value.scaleb(self.decimal_places).to_integral_value(ROUND_HALF_UP))
+
+    def get_db_prep_save(self, value, connection):
+        # DecimalField adapts saved values itself, bypassing get_db_prep_value()
+        if hasattr(value, 'as_sql'):
+            return value
+        return self.get_db_prep_value(value, connection)
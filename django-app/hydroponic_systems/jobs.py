@@ -0,0 +1,131 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from luna.routers import use_primary
+from .models import HydroponicSystem, Job, Measurement
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def register(kind):
+    """
+    Register the decorated function as the handler of jobs of the given kind.
+    The handler receives the Job and may update its progress and total.
+
+    A job not saved for JOB_LEASE_SECONDS is assumed to have lost its worker
+    and is run again, so handlers must be safe to rerun and should save the
+    job's progress regularly.
+    """
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(owner, kind, **payload):
+    """
+    Create a pending job to be picked up by a process_jobs worker.
+    """
+    return Job.objects.create(owner=owner, kind=kind, payload=payload)
+
+
+def get_active_job(kind, **payload):
+    """
+    Return the oldest pending or running job of the given kind whose payload
+    contains the given values, or None.
+    """
+    return (
+        Job.objects
+        .filter(kind=kind, status__in=[Job.PENDING, Job.RUNNING])
+        .filter(**{f'payload__{key}': value for key, value in payload.items()})
+        .order_by('created_at')
+        .first()
+    )
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending job as running and return it, or None if there is
+    nothing to do. Jobs locked by other workers are skipped.
+
+    Running jobs whose lease expired, i.e. not saved for JOB_LEASE_SECONDS
+    because their worker died, are claimed again.
+    """
+    expired = timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Job.PENDING) | Q(status=Job.RUNNING, updated_at__lt=expired))
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        if job.status == Job.RUNNING:
+            logger.warning('Job %s lease expired, running it again', job.pk)
+        job.status = Job.RUNNING
+        job.save(update_fields=['status', 'updated_at'])
+    return job
+
+
+def run_job(job):
+    """
+    Run the handler of a claimed job and record its outcome.
+    """
+    try:
+        with use_primary():
+            HANDLERS[job.kind](job)
+    except Exception as exc:
+        logger.exception('Job %s failed', job.pk)
+        job.status = Job.FAILED
+        job.error = str(exc)
+    else:
+        job.status = Job.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+
+
+def run_pending_jobs(limit=None):
+    """
+    Run pending jobs one by one until none are left or limit jobs have run.
+    Return the number of jobs run.
+    """
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+@register(Job.DELETE_SYSTEM)
+def delete_system(job):
+    """
+    Delete a hydroponic system, removing its measurements in batches of
+    JOB_DELETE_BATCH_SIZE so no single statement locks the whole set.
+    """
+    system_id = job.payload['system_id']
+    measurements = Measurement.objects.filter(system_id=system_id)
+
+    # A rerun after an expired lease continues from the recorded progress
+    job.total = job.progress + measurements.count()
+    job.save(update_fields=['total', 'updated_at'])
+
+    while True:
+        batch = list(measurements.values_list('id', flat=True)[:settings.JOB_DELETE_BATCH_SIZE])
+        if not batch:
+            break
+        Measurement.objects.filter(id__in=batch).delete()
+        job.progress += len(batch)
+        job.save(update_fields=['progress', 'updated_at'])
+
+    HydroponicSystem.objects.filter(pk=system_id).delete()
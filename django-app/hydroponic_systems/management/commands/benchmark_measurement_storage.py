@@ -0,0 +1,115 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from hydroponic_systems.aggregates import HISTOGRAM_RANGES, VALUE_FIELDS
+from hydroponic_systems.models import Measurement
+
+LAYOUTS = ['numeric', 'compact']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the size and read speed of the measurement table with values stored as numeric and as '
+        'scaled integers (ScaledDecimalField). Needs PostgreSQL; the tables are temporary.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Number of measurements in each table.')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per layout, the fastest is reported.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The benchmark measures PostgreSQL storage and needs a PostgreSQL database.')
+
+        fields = [Measurement._meta.get_field(name) for name in VALUE_FIELDS]
+        self.stdout.write(f"Filling both layouts with {options['rows']} measurements...")
+        with connection.cursor() as cursor:
+            try:
+                self.create_tables(cursor, fields, options['rows'])
+                self.stdout.write(f"{'layout':<10}{'table':>12}{'indexes':>12}{'read rows/s':>14}{'AVG() ms':>12}")
+                for layout in LAYOUTS:
+                    table = f'benchmark_measurement_{layout}'
+                    cursor.execute('SELECT pg_relation_size(%s), pg_indexes_size(%s)', [table, table])
+                    table_size, indexes_size = cursor.fetchone()
+                    read = self.best_time(options['repeat'], lambda: self.read_values(table, fields, layout))
+                    average = self.best_time(options['repeat'], lambda: self.average_values(cursor, table, fields))
+                    self.stdout.write(
+                        f"{layout:<10}{table_size / 2 ** 20:>10.1f}MB{indexes_size / 2 ** 20:>10.1f}MB"
+                        f"{options['rows'] / read:>14.0f}{average * 1000:>12.1f}"
+                    )
+            finally:
+                for layout in LAYOUTS:
+                    cursor.execute(f'DROP TABLE IF EXISTS benchmark_measurement_{layout}')
+
+    def create_tables(self, cursor, fields, rows):
+        """
+        Create both layouts with the columns and indexes of Measurement and the
+        same pseudo-random values, spread over the default histogram ranges.
+        """
+        quote = connection.ops.quote_name
+        for layout in LAYOUTS:
+            columns = ', '.join(
+                f'{quote(field.column)} numeric({field.max_digits}, {field.decimal_places}) NOT NULL'
+                if layout == 'numeric' else f'{quote(field.column)} {field.db_type(connection)} NOT NULL'
+                for field in fields
+            )
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE benchmark_measurement_{layout} ('
+                'id bigint PRIMARY KEY, system_id bigint NOT NULL, created_at timestamp with time zone NOT NULL, '
+                'measured_at timestamp with time zone NOT NULL, idempotency_key varchar(64), '
+                f'{columns})'
+            )
+
+        values = ', '.join(
+            f'round(({HISTOGRAM_RANGES[field.name][0]} + random() * '
+            f'{HISTOGRAM_RANGES[field.name][1] - HISTOGRAM_RANGES[field.name][0]})::numeric, {field.decimal_places})'
+            for field in fields
+        )
+        cursor.execute('SELECT setseed(0.5)')
+        cursor.execute(
+            'INSERT INTO benchmark_measurement_numeric '
+            "SELECT g, g %% 100, now() - g * interval '1 second', now() - g * interval '1 second', NULL, "
+            f'{values} FROM generate_series(1, %s) AS g',
+            [rows],
+        )
+        scaled = ', '.join(f'round({quote(field.column)} * {10 ** field.decimal_places})' for field in fields)
+        cursor.execute(
+            'INSERT INTO benchmark_measurement_compact '
+            f'SELECT id, system_id, created_at, measured_at, idempotency_key, {scaled} '
+            'FROM benchmark_measurement_numeric ORDER BY id'
+        )
+
+        for layout in LAYOUTS:
+            table = f'benchmark_measurement_{layout}'
+            cursor.execute(f'CREATE INDEX ON {table} (system_id)')
+            cursor.execute(f'CREATE INDEX ON {table} (created_at)')
+            cursor.execute(f'CREATE UNIQUE INDEX ON {table} (system_id, measured_at)')
+            cursor.execute(f'CREATE UNIQUE INDEX ON {table} (system_id, idempotency_key)')
+            cursor.execute(f'ANALYZE {table}')
+
+    def best_time(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def read_values(self, table, fields, layout):
+        """
+        Stream every value to Python as a Decimal, converting scaled integers
+        the way the ORM does.
+        """
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(f'SELECT {columns} FROM {table}')
+            for row in cursor:
+                if layout == 'compact':
+                    row = [field.from_db_value(value, None, connection) for field, value in zip(fields, row)]
+
+    def average_values(self, cursor, table, fields):
+        averages = ', '.join(f'avg({connection.ops.quote_name(field.column)})' for field in fields)
+        cursor.execute(f'SELECT {averages} FROM {table}')
+        cursor.fetchone()
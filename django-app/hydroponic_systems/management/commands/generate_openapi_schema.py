@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hydroponic_systems.swagger import generate_schema
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the OpenAPI schema served by /api/swagger.json. Run again after changing the API; '
+        'until then the file is older than the code and is ignored.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.OPENAPI_SCHEMA_PATH, help='File to write the schema to.')
+
+    def handle(self, *args, **options):
+        with open(options['output'], 'wb') as schema_file:
+            schema_file.write(generate_schema())
+        self.stdout.write(f"Wrote OpenAPI schema to {options['output']}.")
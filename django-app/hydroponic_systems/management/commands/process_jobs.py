@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hydroponic_systems.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run pending background jobs, polling for new ones until interrupted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no pending jobs are left.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait between polls.')
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_pending_jobs()
+            if count:
+                self.stdout.write(f'Processed {count} job(s).')
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hydroponic_systems', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hydroponicsystem',
+            name='ingest_quota',
+            field=models.PositiveIntegerField(blank=True, help_text='Maximum number of measurements accepted per minute. Empty means unlimited.', null=True),
+        ),
+    ]
@@ -0,0 +1,103 @@
+from django.db import NotSupportedError, migrations
+from django.db.migrations.operations.base import Operation
+
+import hydroponic_systems.fields
+
+
+class AlterFieldsToScaledIntegers(Operation):
+    """
+    Turn DecimalFields of a model into ScaledDecimalFields, converting the
+    stored values between numeric and integer units.
+
+    On PostgreSQL every column is converted by a single ALTER TABLE, which
+    rewrites the table and its indexes once into new files: no dead tuples or
+    dropped columns are left behind, so the space is reclaimed at once without
+    VACUUM FULL. The rewrite holds an ACCESS EXCLUSIVE lock on the table until
+    it finishes, so run it in a maintenance window, or copy the table online
+    with pg_repack-style tooling first on very large installations.
+
+    Other databases alter the fields one by one and scale the values with an
+    UPDATE, which relies on the column keeping the unconverted value while its
+    type changes. SQLite does, which is enough for development and tests.
+    """
+
+    reversible = True
+
+    def __init__(self, model_name, fields):
+        self.model_name = model_name
+        self.fields = fields
+
+    def describe(self):
+        return f"Convert {', '.join(name for name, _ in self.fields)} of {self.model_name} to scaled integers"
+
+    def state_forwards(self, app_label, state):
+        for name, field in self.fields:
+            state.alter_field(app_label, self.model_name.lower(), name, field, True)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self.convert(app_label, schema_editor, from_state, to_state, to_integers=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self.convert(app_label, schema_editor, from_state, to_state, to_integers=False)
+
+    def convert(self, app_label, schema_editor, from_state, to_state, to_integers):
+        connection = schema_editor.connection
+        model = to_state.apps.get_model(app_label, self.model_name)
+        table = schema_editor.quote_name(model._meta.db_table)
+        names = [name for name, _ in self.fields]
+
+        if connection.vendor == 'postgresql':
+            clauses = []
+            for name in names:
+                field = model._meta.get_field(name)
+                column = schema_editor.quote_name(field.column)
+                factor = 10 ** field.decimal_places
+                db_type = field.db_type(connection)
+                using = f'round({column} * {factor})' if to_integers else f'{column} / {factor}.0'
+                clauses.append(f'ALTER COLUMN {column} TYPE {db_type} USING ({using})::{db_type}')
+            schema_editor.execute(f"ALTER TABLE {table} {', '.join(clauses)}")
+            # The rewrite drops the statistics of the converted columns
+            schema_editor.execute(f'ANALYZE {table}')
+            return
+
+        if connection.vendor != 'sqlite':
+            raise NotSupportedError(f'Converting measurement values is not supported on {connection.vendor}.')
+
+        # Each alter_field() rebuilds the table from its model, so the model
+        # must carry the columns converted so far
+        model_key = app_label, self.model_name.lower()
+        state = from_state
+        for name in names:
+            next_state = state.clone()
+            next_state.alter_field(*model_key, name, to_state.models[model_key].fields[name].clone(), True)
+            from_model = state.apps.get_model(*model_key)
+            to_model = next_state.apps.get_model(*model_key)
+            schema_editor.alter_field(from_model, from_model._meta.get_field(name), to_model._meta.get_field(name))
+            state = next_state
+        assignments = []
+        for name in names:
+            field = model._meta.get_field(name)
+            column = schema_editor.quote_name(field.column)
+            factor = 10 ** field.decimal_places
+            assignments.append(f'{column} = ROUND({column} * {factor})' if to_integers else f'{column} = {column} / {factor}.0')
+        schema_editor.execute(f"UPDATE {table} SET {', '.join(assignments)}")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('hydroponic_systems', '0003_job'),
+    ]
+
+    operations = [
+        AlterFieldsToScaledIntegers(
+            model_name='measurement',
+            fields=[
+                ('pH', hydroponic_systems.fields.ScaledDecimalField(decimal_places=2, max_digits=4)),
+                ('water_temperature', hydroponic_systems.fields.ScaledDecimalField(decimal_places=2, max_digits=5)),
+                ('TDS', hydroponic_systems.fields.ScaledDecimalField(decimal_places=2, max_digits=6)),
+            ],
+        ),
+    ]
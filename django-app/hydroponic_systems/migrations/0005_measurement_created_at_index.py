@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hydroponic_systems', '0004_compact_measurement_values'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='measurement',
+            index=models.Index(fields=['created_at'], name='hydroponic__created_9c9a58_idx'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+# This migration runs outside a transaction so that on PostgreSQL ingest keeps
+# running: the backfill commits in batches, NOT NULL is proven by a validated
+# CHECK constraint instead of a scan under an exclusive lock, and the unique
+# constraints are attached to indexes built with CREATE INDEX CONCURRENTLY.
+# Other databases run the plain AlterField and AddConstraint.
+
+BATCH_SIZE = 10000
+
+
+def is_postgresql(schema_editor):
+    return schema_editor.connection.vendor == 'postgresql'
+
+
+class SetNotNull(migrations.AlterField):
+    """
+    AlterField making a nullable column NOT NULL without scanning the table
+    under an ACCESS EXCLUSIVE lock on PostgreSQL.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        table = schema_editor.quote_name(model._meta.db_table)
+        column = schema_editor.quote_name(model._meta.get_field(self.name).column)
+        check = schema_editor.quote_name(f'{model._meta.db_table}_{self.name}_not_null')
+        # SET NOT NULL skips its scan when a valid CHECK already proves it, and
+        # VALIDATE CONSTRAINT scans without blocking writes
+        schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID')
+        schema_editor.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {check}')
+        schema_editor.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+        schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {check}')
+
+
+class AddUniqueConstraintConcurrently(migrations.AddConstraint):
+    """
+    AddConstraint of a UniqueConstraint whose index is built with CREATE UNIQUE
+    INDEX CONCURRENTLY on PostgreSQL, then attached as the constraint.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        table = schema_editor.quote_name(model._meta.db_table)
+        name = schema_editor.quote_name(self.constraint.name)
+        columns = ', '.join(
+            schema_editor.quote_name(model._meta.get_field(field).column) for field in self.constraint.fields
+        )
+        # A failed concurrent build leaves an invalid index behind, drop it so the migration can be rerun
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        schema_editor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({columns})')
+        schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}')
+
+
+def copy_created_at(apps, schema_editor):
+    """
+    Existing measurements were taken when they were received. Copy created_at
+    in primary key ranges of BATCH_SIZE, each committed on its own.
+    """
+    Measurement = apps.get_model('hydroponic_systems', 'Measurement')
+    measurements = Measurement.objects.using(schema_editor.connection.alias)
+    last_id = measurements.aggregate(last_id=models.Max('id'))['last_id'] or 0
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        measurements.filter(
+            id__gte=start, id__lt=start + BATCH_SIZE, measured_at__isnull=True,
+        ).update(measured_at=models.F('created_at'))
+    # Rows inserted while the batches ran
+    measurements.filter(id__gt=last_id, measured_at__isnull=True).update(measured_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('hydroponic_systems', '0005_measurement_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='measurement',
+            name='measured_at',
+            field=models.DateTimeField(null=True, help_text='Time of the reading on the device.'),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        SetNotNull(
+            model_name='measurement',
+            name='measured_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Time of the reading on the device.'),
+        ),
+        migrations.AddField(
+            model_name='measurement',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        AddUniqueConstraintConcurrently(
+            model_name='measurement',
+            constraint=models.UniqueConstraint(fields=('system', 'measured_at'), name='unique_measurement_system_measured_at'),
+        ),
+        AddUniqueConstraintConcurrently(
+            model_name='measurement',
+            constraint=models.UniqueConstraint(fields=('system', 'idempotency_key'), name='unique_measurement_system_idempotency_key'),
+        ),
+    ]
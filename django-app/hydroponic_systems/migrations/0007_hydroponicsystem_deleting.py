@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hydroponic_systems', '0006_measurement_measured_at_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hydroponicsystem',
+            name='deleting',
+            field=models.BooleanField(default=False, help_text='Set while a background job deletes the system.'),
+        ),
+    ]
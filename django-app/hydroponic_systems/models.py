@@ -1,5 +1,7 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
+from .fields import ScaledDecimalField
 
 class HydroponicSystem(models.Model):
     """
@@ -9,6 +11,11 @@ class HydroponicSystem(models.Model):
     name = models.CharField(max_length=255)
     label = models.CharField(max_length=255, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
+    ingest_quota = models.PositiveIntegerField(
+        blank=True, null=True,
+        help_text='Maximum number of measurements accepted per minute. Empty means unlimited.',
+    )
+    deleting = models.BooleanField(default=False, help_text='Set while a background job deletes the system.')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -16,7 +23,7 @@ class HydroponicSystem(models.Model):
         """
         Return the last num_measurements measurements for this hydroponic system.
         """
-        return self.measurements.order_by('-created_at')[:num_measurements]
+        return self.measurements.order_by('-measured_at')[:num_measurements]
 
     def __str__(self):
         return self.label or self.name
@@ -27,9 +34,59 @@ class Measurement(models.Model):
     """
     system = models.ForeignKey(HydroponicSystem, on_delete=models.CASCADE, related_name='measurements')
     created_at = models.DateTimeField(auto_now_add=True)
-    pH = models.DecimalField(max_digits=4, decimal_places=2)
-    water_temperature = models.DecimalField(max_digits=5, decimal_places=2)
-    TDS = models.DecimalField(max_digits=6, decimal_places=2)
+    measured_at = models.DateTimeField(default=timezone.now, help_text='Time of the reading on the device.')
+    idempotency_key = models.CharField(max_length=64, blank=True, null=True)
+    pH = ScaledDecimalField(max_digits=4, decimal_places=2)
+    water_temperature = ScaledDecimalField(max_digits=5, decimal_places=2)
+    TDS = ScaledDecimalField(max_digits=6, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['system', 'measured_at'], name='unique_measurement_system_measured_at'),
+            models.UniqueConstraint(fields=['system', 'idempotency_key'], name='unique_measurement_system_idempotency_key'),
+        ]
 
     def __str__(self):
         return f'Measurement at {self.created_at}'
+
+class Job(models.Model):
+    """
+    Model representing a background job run by the process_jobs command.
+    """
+    DELETE_SYSTEM = 'delete_system'
+    KIND_CHOICES = [
+        (DELETE_SYSTEM, 'Delete hydroponic system'),
+    ]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} ({self.status})'
@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import HydroponicSystem, Measurement
+from .models import HydroponicSystem, Job, Measurement
 
 class HydroponicSystemSerializer(serializers.ModelSerializer):
     """
@@ -15,7 +16,10 @@ class MeasurementSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Measurement
-        fields = ['id', 'system', 'created_at', 'pH', 'water_temperature', 'TDS']
+        fields = ['id', 'system', 'created_at', 'measured_at', 'idempotency_key', 'pH', 'water_temperature', 'TDS']
+        extra_kwargs = {'idempotency_key': {'write_only': True}}
+        # Duplicates are resolved by the database constraints, see MeasurementViewSet.create
+        validators = []
 
     def validate_pH(self, value):
         """
@@ -40,3 +44,36 @@ class MeasurementSerializer(serializers.ModelSerializer):
         if value < 0:
             raise serializers.ValidationError("TDS must be a positive value")
         return value
+
+class MeasurementBatchItemSerializer(MeasurementSerializer):
+    """
+    Serializer for a measurement in a batch ingest. The system is given once
+    for the whole batch and the device timestamp is required.
+    """
+    class Meta(MeasurementSerializer.Meta):
+        fields = ['measured_at', 'idempotency_key', 'pH', 'water_temperature', 'TDS']
+        extra_kwargs = {'measured_at': {'required': True}}
+
+class MeasurementBatchSerializer(serializers.Serializer):
+    """
+    Serializer for a batch of measurements of one hydroponic system.
+    """
+    system = serializers.IntegerField()
+    measurements = MeasurementBatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_measurements(self, value):
+        """
+        Validation for the batch size.
+        """
+        if len(value) > settings.MEASUREMENT_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(f"A batch can contain at most {settings.MEASUREMENT_BATCH_MAX_SIZE} measurements")
+        return value
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Job model.
+    """
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'progress', 'total', 'error', 'created_at', 'updated_at', 'finished_at']
+        read_only_fields = fields
@@ -1,16 +1,94 @@
-from drf_yasg.views import get_schema_view
+import hashlib
+from functools import lru_cache
+from importlib import import_module
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition
 from drf_yasg import openapi
-from rest_framework import permissions
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Hydroponic API",
-        default_version='v1',
-        description="API for managing hydroponic systems and measurements",
-        terms_of_service="xxx",
-        contact=openapi.Contact(email="maciekroll@gmail.com"),
-        license=openapi.License(name="License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
\ No newline at end of file
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+
+api_info = openapi.Info(
+    title="Hydroponic API",
+    default_version='v1',
+    description="API for managing hydroponic systems and measurements",
+    terms_of_service="xxx",
+    contact=openapi.Contact(email="maciekroll@gmail.com"),
+    license=openapi.License(name="License"),
+)
+
+
+def generate_schema():
+    """
+    Generate the public OpenAPI schema of the API, encoded as JSON.
+    """
+    schema = OpenAPISchemaGenerator(api_info).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def is_schema_file_current(path):
+    """
+    Return whether the schema file exists and was written after the last change
+    to the code of this app and of the project package.
+    """
+    if not path.exists():
+        return False
+    packages = [Path(__file__).parent, Path(import_module(settings.ROOT_URLCONF).__file__).parent]
+    code_mtime = max(source.stat().st_mtime for package in packages for source in package.rglob('*.py'))
+    return path.stat().st_mtime >= code_mtime
+
+
+@lru_cache(maxsize=None)
+def get_schema():
+    """
+    Return the OpenAPI schema written by the generate_openapi_schema command,
+    or generate it once per process if the file is missing or older than the
+    code, so a schema left over from before a deployment is never served.
+    """
+    path = settings.OPENAPI_SCHEMA_PATH
+    if is_schema_file_current(path):
+        return path.read_bytes()
+    return generate_schema()
+
+
+@lru_cache(maxsize=None)
+def get_schema_etag():
+    return hashlib.sha256(get_schema()).hexdigest()
+
+
+@condition(etag_func=lambda request: get_schema_etag())
+def schema_json_view(request):
+    """
+    Serve the OpenAPI schema with caching headers, answering 304 Not Modified
+    to clients that already have it.
+    """
+    response = HttpResponse(get_schema(), content_type='application/json')
+    response['Cache-Control'] = f'public, max-age={settings.OPENAPI_SCHEMA_MAX_AGE}'
+    return response
+
+
+def ui_view(renderer_class):
+    """
+    Return a view rendering the Swagger UI or ReDoc page. The page loads the
+    schema from schema_json_view (SPEC_URL in SWAGGER_SETTINGS and
+    REDOC_SETTINGS), so unlike drf_yasg's schema_view.with_ui() rendering it
+    does not generate the schema.
+
+    The page carries the user's CSRF token and login state, so it is not
+    cached; only the schema is.
+    """
+    @never_cache
+    def view(request):
+        # The renderer only reads the title and version of the schema
+        swagger = openapi.Swagger(info=api_info, _prefix='/', paths=openapi.Paths(paths={}))
+        content = renderer_class().render(swagger, renderer_class.media_type, {'request': request})
+        return HttpResponse(content, content_type=f'{renderer_class.media_type}; charset={renderer_class.charset}')
+    return view
+
+
+swagger_ui_view = ui_view(SwaggerUIRenderer)
+redoc_view = ui_view(ReDocRenderer)
@@ -1,45 +1,66 @@
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
-from .serializers import HydroponicSystemSerializer, MeasurementSerializer
+from django.conf import settings
 
-hydroponic_system_list_schema = swagger_auto_schema(
-    manual_parameters=[
-        openapi.Parameter('name', openapi.IN_QUERY, description="Filter by name", type=openapi.TYPE_STRING),
-        openapi.Parameter('label', openapi.IN_QUERY, description="Filter by label", type=openapi.TYPE_STRING),
-        openapi.Parameter('description', openapi.IN_QUERY, description="Filter by description", type=openapi.TYPE_STRING),
-        openapi.Parameter('created_at', openapi.IN_QUERY, description="Filter by created_at", type=openapi.TYPE_STRING),
-        openapi.Parameter('updated_at', openapi.IN_QUERY, description="Filter by updated_at", type=openapi.TYPE_STRING),
-        openapi.Parameter('ordering', openapi.IN_QUERY, description="Order by created_at or updated_at", type=openapi.TYPE_STRING)
-    ],
-    responses={200: HydroponicSystemSerializer(many=True)},
-    security=[
-       {
-            'Bearer': {
-                'type': 'apiKey',
-                'name': 'Authorization',
-                'in': 'header'
-            }
-        },
-    ]
-)
 
-measurement_list_schema = swagger_auto_schema(
-    manual_parameters=[
-        openapi.Parameter('system', openapi.IN_QUERY, description="Filter by system", type=openapi.TYPE_INTEGER),
-        openapi.Parameter('created_at', openapi.IN_QUERY, description="Filter by created_at", type=openapi.TYPE_STRING),
-        openapi.Parameter('pH', openapi.IN_QUERY, description="Filter by pH", type=openapi.TYPE_NUMBER),
-        openapi.Parameter('water_temperature', openapi.IN_QUERY, description="Filter by water_temperature", type=openapi.TYPE_NUMBER),
-        openapi.Parameter('TDS', openapi.IN_QUERY, description="Filter by TDS", type=openapi.TYPE_NUMBER),
-        openapi.Parameter('ordering', openapi.IN_QUERY, description="Order by created_at, pH, water_temperature, or TDS", type=openapi.TYPE_STRING)
-    ],
-    responses={200: MeasurementSerializer(many=True)},
-    security=[
-       {
-            'Bearer': {
-                'type': 'apiKey',
-                'name': 'Authorization',
-                'in': 'header'
-            }
-        },
-    ]
-)
\ No newline at end of file
+def no_schema(view_method):
+    """
+    Stand-in for the schema decorators when API_DOCS is disabled, so drf_yasg
+    is never imported.
+    """
+    return view_method
+
+
+if not settings.API_DOCS:
+    hydroponic_system_list_schema = no_schema
+    measurement_list_schema = no_schema
+else:
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+    from .serializers import HydroponicSystemSerializer, MeasurementSerializer
+
+    hydroponic_system_list_schema = swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('name', openapi.IN_QUERY, description="Filter by name", type=openapi.TYPE_STRING),
+            openapi.Parameter('label', openapi.IN_QUERY, description="Filter by label", type=openapi.TYPE_STRING),
+            openapi.Parameter('description', openapi.IN_QUERY, description="Filter by description", type=openapi.TYPE_STRING),
+            openapi.Parameter('created_at', openapi.IN_QUERY, description="Filter by created_at", type=openapi.TYPE_STRING),
+            openapi.Parameter('updated_at', openapi.IN_QUERY, description="Filter by updated_at", type=openapi.TYPE_STRING),
+            openapi.Parameter('ordering', openapi.IN_QUERY, description="Order by created_at or updated_at", type=openapi.TYPE_STRING)
+        ],
+        responses={200: HydroponicSystemSerializer(many=True)},
+        security=[
+           {
+                'Bearer': {
+                    'type': 'apiKey',
+                    'name': 'Authorization',
+                    'in': 'header'
+                }
+            },
+        ]
+    )
+
+    measurement_list_schema = swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('system', openapi.IN_QUERY, description="Filter by system", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('created_at', openapi.IN_QUERY, description="Filter by created_at", type=openapi.TYPE_STRING),
+            openapi.Parameter('measured_at', openapi.IN_QUERY, description="Filter by measured_at", type=openapi.TYPE_STRING),
+            openapi.Parameter('pH', openapi.IN_QUERY, description="Filter by pH", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('water_temperature', openapi.IN_QUERY, description="Filter by water_temperature", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('TDS', openapi.IN_QUERY, description="Filter by TDS", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('ordering', openapi.IN_QUERY, description="Order by created_at, measured_at, pH, water_temperature, or TDS", type=openapi.TYPE_STRING),
+            openapi.Parameter('aggregate', openapi.IN_QUERY, description="Return aggregates instead of rows, comma separated list of count, min, max, avg, histogram", type=openapi.TYPE_STRING),
+            openapi.Parameter('histogram_field', openapi.IN_QUERY, description="Histogram field: pH, water_temperature or TDS", type=openapi.TYPE_STRING),
+            openapi.Parameter('bins', openapi.IN_QUERY, description="Number of histogram bins", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('histogram_min', openapi.IN_QUERY, description="Lower bound of the histogram", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('histogram_max', openapi.IN_QUERY, description="Upper bound of the histogram", type=openapi.TYPE_NUMBER)
+        ],
+        responses={200: MeasurementSerializer(many=True)},
+        security=[
+           {
+                'Bearer': {
+                    'type': 'apiKey',
+                    'name': 'Authorization',
+                    'in': 'header'
+                }
+            },
+        ]
+    )
@@ -1,13 +1,47 @@
-from django.test import TestCase
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from .models import HydroponicSystem, Measurement
+from .admin import EstimatedCountPaginator
+from .models import HydroponicSystem, Job, Measurement
+from .jobs import run_pending_jobs
+from .swagger import get_schema
+from .throttling import ReadRateThrottle
 from django.contrib.auth.models import User
-from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Avg, F, Sum, Value
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from luna.middleware import PIN_COOKIE_NAME
+from luna.routers import ReplicaRouter, use_primary
+from datetime import datetime, timedelta, timezone as dt_timezone
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-class HydroponicSystemTests(TestCase):
+
+class CacheResetTestCase(TestCase):
+    """
+    TestCase starting every test with an empty cache, so throttle counters and
+    cached users do not leak between tests that reuse the same user ids.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+
+class HydroponicSystemTests(CacheResetTestCase):
     def setUp(self):
+        super().setUp()
         self.user = User.objects.create_user(username='testuser', password='testpassword')
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
@@ -91,10 +125,11 @@ class HydroponicSystemTests(TestCase):
 
  
 
-class MeasurementTests(TestCase):
+class MeasurementTests(CacheResetTestCase):
     def setUp(self):
         """Set up data for the tests with amount of measurements equal to 2."""
 
+        super().setUp()
         self.user = User.objects.create_user(username='testuser', password='testpassword')
         self.client = APIClient()
         self.client.force_authenticate(user=self.user)
@@ -206,3 +241,514 @@ class MeasurementTests(TestCase):
         self.assertEqual(len(response.data['results']), 2)
         self.assertEqual(response.data['results'][1]['id'], self.measurement.id)
         self.assertEqual(response.data['results'][0]['id'], self.measurement2.id)
+
+    def test_create_measurement_retry(self):
+        """Test that retrying a measurement with the same measured_at does not create a duplicate."""
+        url = reverse('measurement-list')
+        data = {
+            'system': self.hydroponic_system.id,
+            'measured_at': '2024-06-02T12:00:00Z',
+            'pH': 7.0,
+            'water_temperature': 26.0,
+            'TDS': 850.0
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        retry = self.client.post(url, data, format='json')
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.data['id'], response.data['id'])
+        self.assertEqual(Measurement.objects.count(), 3)
+
+    def test_create_measurement_default_measured_at_conflict(self):
+        """Test that a measurement colliding on the default measured_at returns the existing one."""
+        url = reverse('measurement-list')
+        data = {'system': self.hydroponic_system.id, 'pH': 7.0, 'water_temperature': 26.0, 'TDS': 850.0}
+        field = Measurement._meta.get_field('measured_at')
+        with mock.patch.object(field, 'get_default', return_value=self.measurement.measured_at):
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.measurement.id)
+        self.assertEqual(Measurement.objects.count(), 2)
+
+    def test_create_measurement_idempotency_key(self):
+        """Test that retrying a measurement with the same idempotency key does not create a duplicate."""
+        url = reverse('measurement-list')
+        data = {'system': self.hydroponic_system.id, 'idempotency_key': 'abc', 'pH': 7.0, 'water_temperature': 26.0, 'TDS': 850.0}
+        self.assertEqual(self.client.post(url, data, format='json').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.post(url, data, format='json').status_code, status.HTTP_200_OK)
+        self.assertEqual(Measurement.objects.count(), 3)
+
+    def test_create_measurement_conflict(self):
+        """Test that a different measurement at the measured_at of a stored one is rejected."""
+        url = reverse('measurement-list')
+        data = {'system': self.hydroponic_system.id, 'measured_at': '2024-06-02T12:00:00Z', 'idempotency_key': 'abc', 'pH': 7.0, 'water_temperature': 26.0, 'TDS': 850.0}
+        self.assertEqual(self.client.post(url, data, format='json').status_code, status.HTTP_201_CREATED)
+        data.update(idempotency_key='def', pH=7.5)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Measurement.objects.count(), 3)
+        self.assertEqual(Measurement.objects.get(idempotency_key='abc').pH, Decimal('7.0'))
+
+    def test_batch_create_measurements_partial_retry(self):
+        """Test that a batch reports the measurements stored before or repeated within it as skipped."""
+        url = reverse('measurement-batch')
+        measurement = {'pH': 6.0, 'water_temperature': 20.0, 'TDS': 500.0}
+        self.client.post(url, {
+            'system': self.hydroponic_system.id,
+            'measurements': [{'measured_at': '2024-06-02T12:00:00Z', 'idempotency_key': 'a', **measurement}],
+        }, format='json')
+        response = self.client.post(url, {
+            'system': self.hydroponic_system.id,
+            'measurements': [
+                {'measured_at': '2024-06-02T12:00:00Z', **measurement},
+                {'measured_at': '2024-06-02T12:01:00Z', 'idempotency_key': 'a', **measurement},
+                {'measured_at': '2024-06-02T12:02:00Z', **measurement},
+                {'measured_at': '2024-06-02T12:02:00Z', **measurement},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'received': 4, 'inserted': 1, 'skipped': 3})
+        self.assertEqual(Measurement.objects.count(), 4)
+
+    def test_batch_create_measurements(self):
+        """Test that a retried batch of backfilled measurements is only stored once."""
+        url = reverse('measurement-batch')
+        data = {
+            'system': self.hydroponic_system.id,
+            'measurements': [
+                {'measured_at': '2024-06-02T12:00:00Z', 'pH': 6.0, 'water_temperature': 20.0, 'TDS': 500.0},
+                {'measured_at': '2024-06-02T12:01:00Z', 'pH': 6.1, 'water_temperature': 20.5, 'TDS': 510.0},
+            ]
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'received': 2, 'inserted': 2, 'skipped': 0})
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'received': 2, 'inserted': 0, 'skipped': 2})
+        self.assertEqual(Measurement.objects.count(), 4)
+        measurement = Measurement.objects.get(pH=6.1)
+        self.assertEqual(measurement.measured_at, datetime(2024, 6, 2, 12, 1, tzinfo=dt_timezone.utc))
+
+    def test_batch_create_measurements_for_other_system(self):
+        """Test that batches for systems of other users are rejected."""
+        other_system = HydroponicSystem.objects.create(
+            owner=User.objects.create_user(username='anotheruser', password='testpassword'), name='Another System'
+        )
+        url = reverse('measurement-batch')
+        data = {
+            'system': other_system.id,
+            'measurements': [{'measured_at': '2024-06-02T12:00:00Z', 'pH': 6.0, 'water_temperature': 20.0, 'TDS': 500.0}]
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_compact_storage(self):
+        """Test that measurement values are stored as scaled integers and read back as decimals."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT "pH", "water_temperature", "TDS" FROM hydroponic_systems_measurement WHERE id = %s',
+                [self.measurement2.id],
+            )
+            self.assertEqual(cursor.fetchone(), (650, 2450, 75000))
+        measurement = Measurement.objects.get(pk=self.measurement2.id)
+        self.assertEqual(measurement.water_temperature, Decimal('24.50'))
+        self.assertEqual(Measurement.objects.filter(pH__lt=Decimal('6.51')).count(), 1)
+
+    def test_aggregate_measurements(self):
+        """Test aggregating filtered measurements without returning rows."""
+        url = reverse('measurement-list')
+        response = self.client.get(url, {'aggregate': 'count,min,max,avg', 'pH__gte': 6.0})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('results', response.data)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(float(response.data['min']['pH']), 6.5)
+        self.assertEqual(float(response.data['max']['TDS']), 800.0)
+        self.assertEqual(float(response.data['avg']['water_temperature']), 24.75)
+
+    def test_aggregate_histogram(self):
+        """Test a fixed-bin histogram of measurement values."""
+        url = reverse('measurement-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'aggregate': 'histogram', 'histogram_field': 'pH', 'bins': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        measurement_queries = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "hydroponic_systems_measurement"' in query['sql']
+        ]
+        self.assertEqual(len(measurement_queries), 1)
+        bins = response.data['histogram']['bins']
+        self.assertEqual([float(b['max']) for b in bins], [7.0, 14.0])
+        self.assertEqual([b['count'] for b in bins], [1, 1])
+
+    def test_scaled_values_in_expressions(self):
+        """Test Avg, Sum and F() arithmetic over the scaled integer columns."""
+        field = Measurement._meta.get_field('pH')
+        values = Measurement.objects.aggregate(
+            raw_avg=Avg('pH'), avg=Avg('pH', output_field=field), sum=Sum('pH'),
+        )
+        self.assertEqual(values['raw_avg'], Decimal('675'))
+        self.assertEqual(values['avg'], Decimal('6.75'))
+        self.assertEqual(values['sum'], Decimal('13.50'))
+
+        Measurement.objects.update(pH=F('pH') + Value(Decimal('1.00'), output_field=field))
+        self.assertEqual(sorted(Measurement.objects.values_list('pH', flat=True)), [Decimal('7.50'), Decimal('8.00')])
+        Measurement.objects.update(pH=F('pH') + 1)
+        self.assertEqual(sorted(Measurement.objects.values_list('pH', flat=True)), [Decimal('7.51'), Decimal('8.01')])
+
+    def test_storage_benchmark_requires_postgresql(self):
+        """Test that the storage benchmark refuses to run outside of Postgres."""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_measurement_storage', rows=10)
+
+    def test_aggregate_invalid(self):
+        """Test that unknown aggregates are rejected."""
+        url = reverse('measurement-list')
+        response = self.client.get(url, {'aggregate': 'median'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_histogram_invalid_range(self):
+        """Test that non-finite bounds and bins narrower than the field precision are rejected."""
+        url = reverse('measurement-list')
+        for params in (
+            {'histogram_min': 'NaN'},
+            {'histogram_max': 'sNaN'},
+            {'histogram_max': 'Infinity'},
+            {'histogram_min': '7', 'histogram_max': '7.05', 'bins': 10},
+        ):
+            response = self.client.get(url, {'aggregate': 'histogram', **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class CachedJWTAuthenticationTests(CacheResetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.hydroponic_system = HydroponicSystem.objects.create(owner=self.user, name='Test System')
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_lookup_is_cached(self):
+        """Test that only the first authenticated request queries the user table."""
+        url = reverse('hydroponic-system-list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertFalse(any('auth_user' in query['sql'] for query in queries.captured_queries))
+
+    def test_deactivated_user_is_rejected(self):
+        """Test that deactivating a user invalidates the cached claims user."""
+        url = reverse('hydroponic-system-list')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_token(self):
+        """Test that with CHECK_REVOKE_TOKEN a password change rejects older tokens."""
+        url = reverse('hydroponic-system-list')
+        with mock.patch.object(jwt_api_settings, 'CHECK_REVOKE_TOKEN', True):
+            token = RefreshToken.for_user(self.user).access_token
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.user.set_password('newpassword')
+            self.user.save()
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ThrottlingTests(CacheResetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.hydroponic_system = HydroponicSystem.objects.create(owner=self.user, name='Test System', ingest_quota=1)
+        self.data = {'system': self.hydroponic_system.id, 'pH': 7.0, 'water_temperature': 26.0, 'TDS': 850.0}
+
+    def test_system_ingest_quota(self):
+        """Test that measurements above the system's ingest quota are rejected."""
+        url = reverse('measurement-list')
+        response = self.client.post(url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Measurement.objects.count(), 1)
+
+    def test_ingest_quota_ignores_other_users(self):
+        """Test that other users' requests do not consume a system's quota."""
+        url = reverse('measurement-list')
+        self.client.force_authenticate(user=User.objects.create_user(username='otheruser', password='testpassword'))
+        response = self.client.post(url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(url, self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_read_rate(self):
+        """Test that reads above the read rate are rejected."""
+        url = reverse('hydroponic-system-list')
+        with mock.patch.object(ReadRateThrottle, 'THROTTLE_RATES', {'read': '1/min'}):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRoutingTests(CacheResetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.router = ReplicaRouter()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_reads_go_to_replica(self):
+        """Test that reads are routed to a replica and writes to the primary."""
+        self.assertEqual(self.router.db_for_read(Measurement), 'replica_0')
+        self.assertEqual(self.router.db_for_write(Measurement), 'default')
+
+    def test_use_primary_pins_reads(self):
+        """Test that reads inside use_primary() are routed to the primary."""
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Measurement), 'default')
+        self.assertEqual(self.router.db_for_read(Measurement), 'replica_0')
+
+    def test_write_sets_pin_cookie(self):
+        """Test that a write request pins the client to the primary."""
+        url = reverse('hydroponic-system-list')
+        response = self.client.post(url, {'name': 'New System'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+
+    def test_write_pins_client_without_cookies(self):
+        """Test that a client that drops cookies is pinned by its Authorization header."""
+        client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('hydroponic-system-list')
+        response = client.post(url, {'name': 'New System'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        client.cookies.clear()
+        # Reads routed to the replica would fail, its alias is not configured
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+@override_settings(SYNC_DELETE_MAX_MEASUREMENTS=1, JOB_DELETE_BATCH_SIZE=2)
+class JobTests(CacheResetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.hydroponic_system = HydroponicSystem.objects.create(owner=self.user, name='Test System')
+        now = timezone.now()
+        Measurement.objects.bulk_create(
+            Measurement(system=self.hydroponic_system, measured_at=now - timedelta(minutes=i), pH=7.0, water_temperature=25.0, TDS=800.0)
+            for i in range(3)
+        )
+
+    def test_delete_large_system_in_background(self):
+        """Test that deleting a large system is queued and done by the worker."""
+        url = reverse('hydroponic-system-detail', kwargs={'pk': self.hydroponic_system.id})
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Job.PENDING)
+        self.assertEqual(HydroponicSystem.objects.count(), 1)
+
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(HydroponicSystem.objects.count(), 0)
+        self.assertEqual(Measurement.objects.count(), 0)
+
+        response = self.client.get(reverse('job-detail', kwargs={'pk': response.data['id']}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Job.DONE)
+        self.assertEqual(response.data['progress'], 3)
+        self.assertEqual(response.data['total'], 3)
+
+    def test_system_pending_deletion_is_hidden(self):
+        """Test that a system queued for deletion is hidden, rejects measurements and is queued once."""
+        url = reverse('hydroponic-system-detail', kwargs={'pk': self.hydroponic_system.id})
+        first = self.client.delete(url)
+        second = self.client.delete(url)
+        self.assertEqual(second.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Job.objects.count(), 1)
+
+        response = self.client.get(reverse('hydroponic-system-list'))
+        self.assertEqual(response.data['count'], 0)
+        response = self.client.get(reverse('measurement-list'))
+        self.assertEqual(response.data['count'], 0)
+        data = {'system': self.hydroponic_system.id, 'pH': 7.0, 'water_temperature': 25.0, 'TDS': 800.0}
+        response = self.client.post(reverse('measurement-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_expired_lease_is_claimed_again(self):
+        """Test that a running job whose worker stopped saving it is run again."""
+        job = Job.objects.create(owner=self.user, kind=Job.DELETE_SYSTEM, status=Job.RUNNING, payload={'system_id': self.hydroponic_system.id})
+        self.assertEqual(run_pending_jobs(), 0)
+
+        Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS + 1))
+        with self.assertLogs('hydroponic_systems.jobs', level='WARNING'):
+            self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertFalse(HydroponicSystem.objects.exists())
+
+    def test_failed_job(self):
+        """Test that a failing job is recorded as failed."""
+        job = Job.objects.create(owner=self.user, kind=Job.DELETE_SYSTEM, payload={})
+        with self.assertLogs('hydroponic_systems.jobs', level='ERROR'):
+            run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertTrue(job.error)
+
+    def test_access_user_jobs(self):
+        """Test that jobs of other users are not visible."""
+        job = Job.objects.create(owner=self.user, kind=Job.DELETE_SYSTEM, payload={})
+        self.client.force_authenticate(user=User.objects.create_user(username='otheruser', password='testpassword'))
+        response = self.client.get(reverse('job-detail', kwargs={'pk': job.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AdminTests(CacheResetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_superuser(username='admin', password='testpassword')
+        self.client.force_login(self.user)
+        self.hydroponic_system = HydroponicSystem.objects.create(owner=self.user, name='Test System')
+        Measurement.objects.create(system=self.hydroponic_system, pH=7.0, water_temperature=25.0, TDS=800.0)
+
+    def test_measurement_changelist(self):
+        """Test that the measurement changelist loads with its related systems in one query."""
+        url = reverse('admin:hydroponic_systems_measurement_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'Test System')
+        system_queries = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "hydroponic_systems_hydroponicsystem"' in query['sql']
+        ]
+        self.assertEqual(system_queries, [])
+
+    def test_measurement_changelist_date_filter(self):
+        """Test that the changelist filters by created_at ranges without scanning for distinct dates."""
+        url = reverse('admin:hydroponic_systems_measurement_changelist')
+        since = (timezone.now() - timedelta(days=7)).date()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'created_at__gte': since.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, 'Test System')
+        for query in queries.captured_queries:
+            self.assertNotIn('DISTINCT', query['sql'])
+            self.assertNotIn('TRUNC', query['sql'].upper())
+
+    def test_estimated_count_paginator(self):
+        """Test that the paginator counts exactly outside of Postgres."""
+        paginator = EstimatedCountPaginator(Measurement.objects.order_by('-created_at'), 10)
+        self.assertEqual(paginator.count, 1)
+
+    def test_estimated_count_paginator_postgresql(self):
+        """Test that on Postgres large unfiltered tables are counted from the planner estimate."""
+        fake_connection = mock.MagicMock(vendor='postgresql')
+        cursor = fake_connection.cursor.return_value.__enter__.return_value
+        measurements = Measurement.objects.order_by('-created_at')
+        with mock.patch('hydroponic_systems.admin.connections', {'default': fake_connection}):
+            cursor.fetchone.return_value = (250000.0,)
+            self.assertEqual(EstimatedCountPaginator(measurements, 10).count, 250000)
+            self.assertIn('reltuples', cursor.execute.call_args.args[0])
+            # Filtered or small tables are counted exactly
+            self.assertEqual(EstimatedCountPaginator(measurements.filter(pH=7.0), 10).count, 1)
+            cursor.fetchone.return_value = (10.0,)
+            self.assertEqual(EstimatedCountPaginator(measurements, 10).count, 1)
+
+    def test_hydroponic_system_changelist(self):
+        """Test that the hydroponic system changelist loads."""
+        url = reverse('admin:hydroponic_systems_hydroponicsystem_changelist')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class StartupTests(SimpleTestCase):
+    """
+    Startup benchmark of a worker process, measured with python -X importtime.
+    The import time budget is only checked when the STARTUP_IMPORT_BUDGET_MS
+    environment variable is set, as timings vary too much between machines.
+    """
+    OPTIONAL_PACKAGES = ('drf_yasg', 'silk', 'debug_toolbar')
+
+    def import_times(self, **env):
+        """Return {module: self time in microseconds} of loading the project's URLconf."""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import django; django.setup(); import luna.urls'],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_time, _, module = line[len('import time:'):].split('|')
+            times[module.strip()] = int(self_time)
+        return times
+
+    def test_lean_startup(self):
+        """Test that a worker without docs and profiling skips their packages."""
+        times = self.import_times(DEBUG='0', API_DOCS='0', PROFILING='0')
+        packages = {module.split('.')[0] for module in times}
+        for package in self.OPTIONAL_PACKAGES:
+            self.assertNotIn(package, packages)
+
+    @skipUnless(os.getenv('STARTUP_IMPORT_BUDGET_MS'), 'set STARTUP_IMPORT_BUDGET_MS to check the import time budget')
+    def test_startup_import_budget(self):
+        """Test that a worker without docs and profiling loads within the import time budget."""
+        times = self.import_times(DEBUG='0', API_DOCS='0', PROFILING='0')
+        total_ms = sum(times.values()) / 1000
+        budget_ms = int(os.environ['STARTUP_IMPORT_BUDGET_MS'])
+        self.assertLess(total_ms, budget_ms, f'Startup imports took {total_ms:.0f} ms, budget is {budget_ms} ms')
+
+
+class SchemaTests(CacheResetTestCase):
+    def test_schema_json(self):
+        """Test that the OpenAPI schema is served with caching headers and revalidated by ETag."""
+        url = reverse('schema-json')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('/measurement/', response.json()['paths'])
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_documentation_pages(self):
+        """Test that the documentation pages load the pre-generated schema."""
+        for name in ('schema-swagger-ui', 'schema-redoc'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertContains(response, reverse('schema-json'))
+            self.assertIn('private', response['Cache-Control'])
+            self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_stale_schema_file_is_ignored(self):
+        """Test that a schema file older than the code is not served."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'openapi.json'
+            path.write_bytes(b'{"stale": true}')
+            os.utime(path, (0, 0))
+            get_schema.cache_clear()
+            try:
+                with override_settings(OPENAPI_SCHEMA_PATH=path):
+                    self.assertNotIn(b'stale', get_schema())
+                    path.touch()
+                    get_schema.cache_clear()
+                    self.assertIn(b'stale', get_schema())
+            finally:
+                get_schema.cache_clear()
@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+from .models import HydroponicSystem
+
+INGEST_QUOTA_CACHE_KEY = 'ingest-quota:{}'
+INGEST_QUOTA_CACHE_TIMEOUT = 60
+
+
+class CounterRateThrottle(SimpleRateThrottle):
+    """
+    Fixed-window rate throttle backed by an atomic cache counter.
+
+    SimpleRateThrottle reads, trims and rewrites a list of timestamps on every
+    request, which is racy under concurrent requests. Here each request is a
+    single cache.incr(), which is atomic in the local-memory and Redis backends.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        return self.consume(self.key)
+
+    def consume(self, key, amount=1):
+        """
+        Add amount to the counter of the current window and check it against
+        num_requests.
+        """
+        self.now = self.timer()
+        window_key = f'{key}_{int(self.now // self.duration)}'
+        self.cache.add(window_key, 0, self.duration)
+        try:
+            count = self.cache.incr(window_key, amount)
+        except ValueError:
+            # The window expired between add() and incr()
+            self.cache.set(window_key, amount, self.duration)
+            count = amount
+
+        if count > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def wait(self):
+        return self.duration - (self.now % self.duration)
+
+
+class ReadRateThrottle(CounterRateThrottle):
+    """
+    Limits read requests (GET, HEAD, OPTIONS) per user.
+    """
+    scope = 'read'
+
+    def get_cache_key(self, request, view):
+        if request.method not in SAFE_METHODS:
+            return None
+        return self.get_ident_key(request)
+
+
+class IngestRateThrottle(CounterRateThrottle):
+    """
+    Limits write requests per user.
+    """
+    scope = 'ingest'
+
+    def get_cache_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        return self.get_ident_key(request)
+
+
+def get_ingest_quota(system_id):
+    """
+    Return (owner_id, ingest_quota) of a hydroponic system, cached for
+    INGEST_QUOTA_CACHE_TIMEOUT seconds. Returns None if the system does not exist.
+    """
+    return cache.get_or_set(
+        INGEST_QUOTA_CACHE_KEY.format(system_id),
+        lambda: HydroponicSystem.objects.filter(pk=system_id).values_list('owner_id', 'ingest_quota').first(),
+        INGEST_QUOTA_CACHE_TIMEOUT,
+    )
+
+
+class SystemIngestQuotaThrottle(CounterRateThrottle):
+    """
+    Limits measurements created per hydroponic system to its ingest_quota per
+    minute. Systems without a quota are not limited.
+    """
+    scope = 'system_ingest'
+
+    def get_rate(self):
+        # The rate comes from the system's ingest_quota, see allow_request()
+        return None
+
+    def allow_request(self, request, view):
+        if request.method != 'POST':
+            return True
+
+        if not hasattr(request.data, 'get'):
+            return True
+
+        system_id = request.data.get('system')
+        try:
+            system_id = int(system_id)
+        except (TypeError, ValueError):
+            return True
+
+        system = get_ingest_quota(system_id)
+        if system is None:
+            return True
+
+        owner_id, quota = system
+        # Requests for another user's system are rejected by the view, they
+        # must not eat into the owner's quota.
+        if quota is None or owner_id != request.user.pk:
+            return True
+
+        # A batch ingest counts every measurement it contains
+        measurements = request.data.get('measurements')
+        amount = len(measurements) if isinstance(measurements, list) else 1
+
+        self.num_requests, self.duration = quota, 60
+        return self.consume(self.cache_format % {'scope': self.scope, 'ident': system_id}, amount)
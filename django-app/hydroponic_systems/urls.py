@@ -1,15 +1,16 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import HydroponicSystemViewSet, MeasurementViewSet
+from .views import HydroponicSystemViewSet, JobViewSet, MeasurementViewSet
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from .swagger import schema_view 
 
 router = DefaultRouter()
 router.register(r'hydroponic', HydroponicSystemViewSet, basename='hydroponic-system')
 router.register(r'measurement', MeasurementViewSet, basename='measurement')
+router.register(r'job', JobViewSet, basename='job')
 
 urlpatterns = [
     # API endpoints for hydroponic systems and measurements
@@ -18,8 +19,14 @@ urlpatterns = [
     # Token endpoints for authentication
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    
-    # Swagger and Redoc documentation
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
+
+if settings.API_DOCS:
+    from .swagger import redoc_view, schema_json_view, swagger_ui_view
+
+    # Swagger and Redoc documentation
+    urlpatterns += [
+        path('swagger.json', schema_json_view, name='schema-json'),
+        path('swagger/', swagger_ui_view, name='schema-swagger-ui'),
+        path('redoc/', redoc_view, name='schema-redoc'),
+    ]
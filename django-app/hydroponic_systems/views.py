@@ -1,13 +1,19 @@
 from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import HydroponicSystem, Measurement
-from .serializers import HydroponicSystemSerializer, MeasurementSerializer
+from .models import HydroponicSystem, Job, Measurement
+from .serializers import HydroponicSystemSerializer, JobSerializer, MeasurementBatchSerializer, MeasurementSerializer
+from .jobs import enqueue, get_active_job
+from .aggregates import aggregate_measurements
 from .permissions import IsMeasurementOwner
+from .throttling import ReadRateThrottle, IngestRateThrottle, SystemIngestQuotaThrottle
 from .swagger_schemas import hydroponic_system_list_schema, measurement_list_schema
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
 
 class HydroponicSystemViewSet(viewsets.ModelViewSet):
     """
@@ -22,6 +28,7 @@ class HydroponicSystemViewSet(viewsets.ModelViewSet):
     queryset = HydroponicSystem.objects.all()
     serializer_class = HydroponicSystemSerializer
     permission_classes = [IsAuthenticated]
+    throttle_classes = [ReadRateThrottle, IngestRateThrottle]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = {
         'name': ['exact', 'icontains'],
@@ -70,8 +77,16 @@ class HydroponicSystemViewSet(viewsets.ModelViewSet):
         """
         Get a queryset of hydroponic systems owned by the authenticated user.
         Apply default ordering if no ordering parameter is provided.
+
+        Systems being deleted by a background job are hidden, except from
+        destroy, which returns their job.
         """
+        if getattr(self, 'swagger_fake_view', False):
+            return self.queryset.none()
+
         queryset = self.queryset.filter(owner=self.request.user)
+        if self.action != 'destroy':
+            queryset = queryset.filter(deleting=False)
 
         if not self.request.query_params.get('ordering'):
             queryset = queryset.order_by('-updated_at')
@@ -125,10 +140,30 @@ class HydroponicSystemViewSet(viewsets.ModelViewSet):
     def destroy(self, request, pk=None):
         """
         Delete a hydroponic system owned by the authenticated user.
+
+        Systems with more than SYNC_DELETE_MAX_MEASUREMENTS measurements are
+        deleted by a background job instead. The system is hidden and accepts
+        no measurements from then on, and the response is 202 with the job,
+        whose progress can be followed at /api/job/<id>/. Repeating the
+        request returns the same job while it is pending or running.
         """
         instance = self.get_object()
-        instance.delete()
-        return Response({"message": "Hydroponic system deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
+
+        with transaction.atomic():
+            # Lock the system so concurrent requests queue a single job
+            instance = HydroponicSystem.objects.select_for_update().get(pk=instance.pk)
+            job = get_active_job(Job.DELETE_SYSTEM, system_id=instance.id) if instance.deleting else None
+            if job is None:
+                limit = settings.SYNC_DELETE_MAX_MEASUREMENTS
+                if instance.measurements.all()[:limit + 1].count() <= limit:
+                    instance.delete()
+                    return Response({"message": "Hydroponic system deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
+
+                job = enqueue(request.user, Job.DELETE_SYSTEM, system_id=instance.id)
+                instance.deleting = True
+                instance.save(update_fields=['deleting'])
+
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
 
 class MeasurementViewSet(viewsets.ModelViewSet):
@@ -146,47 +181,229 @@ class MeasurementViewSet(viewsets.ModelViewSet):
     filterset_fields = {
         'system': ['exact'],
         'created_at': ['exact', 'lt', 'lte', 'gt', 'gte'],
+        'measured_at': ['exact', 'lt', 'lte', 'gt', 'gte'],
         'pH': ['exact', 'lt', 'lte', 'gt', 'gte'],
         'water_temperature': ['exact', 'lt', 'lte', 'gt', 'gte'],
         'TDS': ['exact', 'lt', 'lte', 'gt', 'gte']
     }
-    ordering_fields = ['created_at', 'pH', 'water_temperature', 'TDS']
+    ordering_fields = ['created_at', 'measured_at', 'pH', 'water_temperature', 'TDS']
     permission_classes = [IsAuthenticated, IsMeasurementOwner]
+    throttle_classes = [ReadRateThrottle, IngestRateThrottle, SystemIngestQuotaThrottle]
 
     @measurement_list_schema
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        """
+        List measurements, or with the `aggregate` query parameter return
+        aggregates over the filtered measurements instead of the rows.
+
+        Query Parameters:
+        - aggregate: comma separated list of count, min, max, avg, histogram (optional)
+        - histogram_field: pH, water_temperature or TDS, defaults to pH (optional)
+        - bins: number of histogram bins, defaults to 10 (optional)
+        - histogram_min, histogram_max: histogram range, defaults depend on the field (optional)
+
+        Response Body with aggregate=count,min,histogram&bins=2:
+        {
+            "count": 2,
+            "min": {"pH": 6.5, "water_temperature": 24.5, "TDS": 750.0},
+            "histogram": {
+                "field": "pH",
+                "bins": [
+                    {"min": 0.0, "max": 7.0, "count": 1},
+                    {"min": 7.0, "max": 14.0, "count": 1}
+                ]
+            }
+        }
+        """
+        if 'aggregate' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            data = aggregate_measurements(queryset, request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
 
     def create(self, request, pk=None):
         """
         Create a new measurement associated with a hydroponic system owned by the authenticated user.
 
+        measured_at is the time of the reading on the device and defaults to now.
+        A system has at most one measurement per measured_at and per
+        idempotency_key, so a retried request returns the existing measurement
+        with status 200 instead of creating a duplicate. A request is a retry
+        when it has the idempotency_key of a stored measurement or, without a
+        key, the measured_at of one. A different measurement at a taken
+        measured_at is rejected with status 409.
+
         Request Body:
         {
             "system": 1,
+            "measured_at": "2024-06-02T12:00:00Z",
+            "idempotency_key": "Optional client generated key",
             "pH": 6.5,
             "water_temperature": 25.5,
             "TDS": 500
         }
         """
         system_id = request.data.get('system')
-        system = HydroponicSystem.objects.filter(id=system_id, owner=request.user).first()
+        system = HydroponicSystem.objects.filter(id=system_id, owner=request.user, deleting=False).first()
 
-        if system:
-            system.save()
-            return super().create(request)
-        else:
+        if not system:
             return Response({"error": "You do not have permission to create measurements for this system."}, status=status.HTTP_403_FORBIDDEN)
 
+        system.save()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Resolve the default up front, so a conflicting insert is looked up by the stored value
+        if 'measured_at' not in serializer.validated_data:
+            serializer.validated_data['measured_at'] = Measurement._meta.get_field('measured_at').get_default()
+        try:
+            with transaction.atomic():
+                self.perform_create(serializer)
+        except IntegrityError:
+            duplicate = self.get_duplicate(system, serializer.validated_data)
+            if duplicate is not None:
+                return Response(self.get_serializer(duplicate).data, status=status.HTTP_200_OK)
+            if Measurement.objects.filter(system=system, measured_at=serializer.validated_data['measured_at']).exists():
+                return Response({"error": "Another measurement of this system with this measured_at already exists."}, status=status.HTTP_409_CONFLICT)
+            raise
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(serializer.data))
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError({"error": "A measurement of this system with this measured_at or idempotency_key already exists."})
+
+    def get_duplicate(self, system, data):
+        """
+        Return the measurement of the system that data is a retry of, if any:
+        the one with the same idempotency_key or, when data has no key, the
+        one with the same measured_at.
+        """
+        measurements = Measurement.objects.filter(system=system)
+        if data.get('idempotency_key'):
+            return measurements.filter(idempotency_key=data['idempotency_key']).first()
+        return measurements.filter(measured_at=data['measured_at']).first()
+
+    def get_new_measurements(self, system, measurements):
+        """
+        Return the measurements of a batch that are not stored yet, leaving out
+        those repeating the measured_at or idempotency_key of a stored or an
+        earlier measurement of the batch.
+        """
+        keys = [data['idempotency_key'] for data in measurements if data.get('idempotency_key')]
+        stored = Measurement.objects.filter(system=system).filter(
+            Q(measured_at__in=[data['measured_at'] for data in measurements]) | Q(idempotency_key__in=keys)
+        ).values_list('measured_at', 'idempotency_key')
+
+        seen_measured_at = set()
+        seen_keys = set()
+        for measured_at, key in stored:
+            seen_measured_at.add(measured_at)
+            seen_keys.add(key)
+
+        new = []
+        for data in measurements:
+            key = data.get('idempotency_key')
+            if data['measured_at'] in seen_measured_at or (key and key in seen_keys):
+                continue
+            seen_measured_at.add(data['measured_at'])
+            seen_keys.add(key)
+            new.append(data)
+        return new
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Create many measurements of a hydroponic system owned by the authenticated user,
+        e.g. a gateway's offline backfill.
+
+        Measurements that already exist for the same measured_at or
+        idempotency_key are skipped, so retrying a batch never creates
+        duplicates. The response counts the inserted and skipped measurements
+        and is 200 instead of 201 when nothing was inserted. Measurements
+        ingested concurrently by another request are still skipped by the
+        database (INSERT ... ON CONFLICT DO NOTHING), but counted as inserted.
+
+        Request Body:
+        {
+            "system": 1,
+            "measurements": [
+                {
+                    "measured_at": "2024-06-02T12:00:00Z",
+                    "idempotency_key": "Optional client generated key",
+                    "pH": 6.5,
+                    "water_temperature": 25.5,
+                    "TDS": 500
+                },
+                ...
+            ]
+        }
+
+        Response Body:
+        {
+            "received": 1,
+            "inserted": 1,
+            "skipped": 0
+        }
+        """
+        serializer = MeasurementBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        system = HydroponicSystem.objects.filter(id=serializer.validated_data['system'], owner=request.user, deleting=False).first()
+        if not system:
+            return Response({"error": "You do not have permission to create measurements for this system."}, status=status.HTTP_403_FORBIDDEN)
+
+        system.save()
+        measurements = serializer.validated_data['measurements']
+        new = self.get_new_measurements(system, measurements)
+        Measurement.objects.bulk_create(
+            [Measurement(system=system, **data) for data in new],
+            ignore_conflicts=True,
+        )
+        return Response(
+            {"received": len(measurements), "inserted": len(new), "skipped": len(measurements) - len(new)},
+            status=status.HTTP_201_CREATED if new else status.HTTP_200_OK,
+        )
+
     def get_queryset(self):
         """
-        Get a queryset of measurements associated with hydroponic systems owned by the authenticated user.
+        Get a queryset of measurements associated with hydroponic systems owned by the authenticated user,
+        leaving out systems being deleted.
         """
-        user_systems = HydroponicSystem.objects.filter(owner=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            return Measurement.objects.none()
+
+        user_systems = HydroponicSystem.objects.filter(owner=self.request.user, deleting=False)
         user_system_ids = user_systems.values_list('id', flat=True)
         queryset = Measurement.objects.filter(system_id__in=user_system_ids)
 
         if not self.request.query_params.get('ordering'):
             queryset = queryset.order_by('-created_at')
 
-        return queryset
\ No newline at end of file
+        return queryset
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for following background jobs started by the authenticated user.
+
+    - List jobs of the authenticated user, newest first.
+    - Retrieve the status and progress of a specific job.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ReadRateThrottle]
+
+    def get_queryset(self):
+        """
+        Get a queryset of jobs started by the authenticated user.
+        """
+        if getattr(self, 'swagger_fake_view', False):
+            return Job.objects.none()
+
+        return Job.objects.filter(owner=self.request.user).order_by('-created_at')
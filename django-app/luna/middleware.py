@@ -0,0 +1,64 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .routers import use_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE_NAME = 'use_primary'
+PIN_CACHE_KEY = 'use-primary:{}'
+
+
+def get_pin_cache_key(request):
+    """
+    Return the cache key pinning the client sending the request's
+    Authorization header, or None for requests without one.
+    """
+    authorization = request.headers.get('Authorization')
+    if not authorization:
+        return None
+    return PIN_CACHE_KEY.format(hashlib.sha256(authorization.encode()).hexdigest())
+
+
+class ReplicaPinningMiddleware:
+    """
+    Keep a client on the primary database for REPLICA_STICKY_SECONDS after it
+    sends a write request, so replica lag never hides its own changes.
+
+    Write requests themselves run entirely against the primary. Clients that
+    wrote recently are recognised by a short-lived cookie and, because API
+    clients and gateways often drop cookies, by a cache entry keyed on a hash
+    of their Authorization header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        is_write = request.method not in SAFE_METHODS
+        pin_cache_key = get_pin_cache_key(request)
+        if is_write or self.is_pinned(request, pin_cache_key):
+            with use_primary():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+
+        if is_write:
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+            if pin_cache_key is not None:
+                cache.set(pin_cache_key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    def is_pinned(self, request, pin_cache_key):
+        if PIN_COOKIE_NAME in request.COOKIES:
+            return True
+        return pin_cache_key is not None and cache.get(pin_cache_key, False)
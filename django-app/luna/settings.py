@@ -25,10 +25,24 @@ load_dotenv()
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')
 
+
+def env_bool(name, default):
+    """Read a boolean environment variable, accepting 1/true/yes/on in any case."""
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv('DEBUG', '0')
+DEBUG = env_bool('DEBUG', '0')
 
-ALLOWED_HOSTS = []
+# Swagger/Redoc documentation (drf_yasg), enabled by default
+API_DOCS = env_bool('API_DOCS', '1')
+
+# Profiling tools (django-debug-toolbar, django-silk), enabled by default in debug mode only
+PROFILING = env_bool('PROFILING', '1' if DEBUG else '0')
+
+# Comma separated host names served by the site. The default matches what
+# Django allows in debug mode, so local deployments work with DEBUG off too.
+ALLOWED_HOSTS = [host.strip() for host in os.getenv('ALLOWED_HOSTS', '.localhost,127.0.0.1,[::1]').split(',') if host.strip()]
 
 
 # Application definition
@@ -43,24 +57,29 @@ INSTALLED_APPS = [
     'django_filters',
     'hydroponic_systems',
     'rest_framework',
-    'drf_yasg',
-    'debug_toolbar',
-    'silk',
-
 ]
 
+if API_DOCS:
+    INSTALLED_APPS += ['drf_yasg']
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'luna.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
-    'silk.middleware.SilkyMiddleware',
 ]
 
+if PROFILING:
+    INSTALLED_APPS += ['debug_toolbar', 'silk']
+    MIDDLEWARE += [
+        'debug_toolbar.middleware.DebugToolbarMiddleware',
+        'silk.middleware.SilkyMiddleware',
+    ]
+
 ROOT_URLCONF = 'luna.urls'
 
 TEMPLATES = [
@@ -96,6 +115,34 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma separated hosts sharing the primary's name and credentials.
+# Reads are routed to them by luna.routers.ReplicaRouter.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['luna.routers.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
+# Cache holding throttle counters, cached JWT users and replica pins. Set
+# REDIS_URL to share it between processes; without it every process has its
+# own local-memory cache.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -117,10 +164,14 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'hydroponic_systems.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.getenv('THROTTLE_READ_RATE', '600/min'),
+        'ingest': os.getenv('THROTTLE_INGEST_RATE', '120/min'),
+    },
 }
 
 
@@ -129,6 +180,21 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Seconds a user's active flag is cached by CachedJWTAuthentication
+JWT_USER_CACHE_TIMEOUT = int(os.getenv('JWT_USER_CACHE_TIMEOUT', '60'))
+
+# Hydroponic systems with more measurements are deleted by a background job
+SYNC_DELETE_MAX_MEASUREMENTS = int(os.getenv('SYNC_DELETE_MAX_MEASUREMENTS', '10000'))
+
+# Measurements deleted per statement by background jobs
+JOB_DELETE_BATCH_SIZE = int(os.getenv('JOB_DELETE_BATCH_SIZE', '5000'))
+
+# Running jobs not updated for this many seconds were left by a dead worker and are claimed again
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '300'))
+
+# Maximum number of measurements in one batch ingest request
+MEASUREMENT_BATCH_MAX_SIZE = int(os.getenv('MEASUREMENT_BATCH_MAX_SIZE', '1000'))
+
 SWAGGER_SETTINGS = {
    'SECURITY_DEFINITIONS': {
       'Bearer': {
@@ -136,9 +202,21 @@ SWAGGER_SETTINGS = {
             'name': 'Bearer',
             'in': 'header'
       }
-   }
+   },
+   'SPEC_URL': 'schema-json',
+}
+
+REDOC_SETTINGS = {
+   'SPEC_URL': 'schema-json',
 }
 
+# OpenAPI schema written by the generate_openapi_schema command and served by /api/swagger.json.
+# A file older than the code is ignored and the schema is generated instead.
+OPENAPI_SCHEMA_PATH = BASE_DIR / 'openapi.json'
+
+# Seconds clients may cache the OpenAPI schema and documentation pages
+OPENAPI_SCHEMA_MAX_AGE = int(os.getenv('OPENAPI_SCHEMA_MAX_AGE', '86400'))
+
 DEBUG_TOOLBAR_CONFIG = {
     'SHOW_TOOLBAR_CALLBACK': lambda request: True,
 }
@@ -24,7 +24,7 @@ urlpatterns = [
     path('api/', include('hydroponic_systems.urls')),
 ]
 
-if settings.DEBUG:
+if settings.PROFILING:
     import debug_toolbar
     urlpatterns += [
         path('__debug__/', include(debug_toolbar.urls)),
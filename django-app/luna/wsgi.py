@@ -7,10 +7,21 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 """
 
+import gc
 import os
+from importlib import import_module
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'luna.settings')
 
 application = get_wsgi_application()
+
+# Load the URLconf (and with it every view, serializer and model) now instead
+# of on the first request, then move all these objects out of the garbage
+# collector's reach. With a preforking server loading the app in the master
+# (e.g. gunicorn --preload) the workers then keep sharing these memory pages
+# instead of copying them when a collection touches the objects.
+import_module(settings.ROOT_URLCONF)
+gc.freeze()